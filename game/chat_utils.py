@@ -1,7 +1,32 @@
 import base64
+import collections
+import io
 import os
+import re
+import threading
 import time
 
+# Read size for streaming Base64 encoding. Must be a multiple of 3 so that
+# each chunk encodes without padding and the pieces concatenate cleanly.
+ENCODE_CHUNK_SIZE = 3 * 65536
+
+# Slice size for streaming Base64 decoding; a multiple of 4 so every slice
+# is a whole number of Base64 quanta.
+DECODE_CHUNK_SIZE = 4 * 65536
+
+# Stickers whose Base64 text is longer than this are sent as several
+# "sticker_chunk" chat messages so each one fits in a single UDP datagram.
+STICKER_CHUNK_SIZE = 48 * 1024
+# Reassembly limits, so a peer can't make us buffer unbounded data
+MAX_STICKER_CHUNKS = 256
+MAX_PENDING_STICKERS = 4
+# Largest file that still fits in MAX_STICKER_CHUNKS once Base64-encoded
+MAX_STICKER_FILE_SIZE = MAX_STICKER_CHUNKS * STICKER_CHUNK_SIZE * 3 // 4
+# Total Base64 text kept by the encode cache
+ENCODE_CACHE_BYTES = 16 * 1024 * 1024
+
+_UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
 
 class ChatManager:
     """
@@ -16,9 +41,20 @@ class ChatManager:
         Reads a local file and converts it for transmission.
         """
         try:
-            with open(filepath, "rb") as image_file:
-                encoded_string = base64.b64encode(image_file.read()).decode("utf-8")
-                return encoded_string
+            st = os.stat(filepath)
+            if st.st_size > MAX_STICKER_FILE_SIZE:
+                # Checked before encoding: the peer would drop it anyway
+                print(
+                    f"[Chat Error] Sticker too large ({st.st_size} bytes)! "
+                    f"Max is {MAX_STICKER_FILE_SIZE}."
+                )
+                return None
+            # Memoized on (path, mtime, size): resending a sticker skips disk + Base64
+            key = (os.path.abspath(filepath), st.st_mtime_ns, st.st_size)
+            encoded = _encode_cache.get(key)
+            if encoded is None:
+                encoded = _encode_cache.put(key, _encode_file(key[0]))
+            return encoded
         except FileNotFoundError:
             print(f"[Chat Error] File '{filepath}' not found.")
             return None
@@ -27,18 +63,151 @@ class ChatManager:
             return None
 
     @staticmethod
-    def save_sticker(base64_string, sender_name):
+    def split_sticker(b64_data):
+        """Splits Base64 sticker text into STICKER_CHUNK_SIZE pieces."""
+        return [
+            b64_data[i : i + STICKER_CHUNK_SIZE]
+            for i in range(0, len(b64_data), STICKER_CHUNK_SIZE)
+        ]
+
+
+class _EncodeCache:
+    """LRU cache of encoded stickers, bounded by total size, not entry count."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Caches value if it fits, evicting the oldest entries; returns it."""
+        if len(value) > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            while self._entries and self._size + len(value) > self.max_bytes:
+                self._size -= len(self._entries.popitem(last=False)[1])
+            self._entries[key] = value
+            self._size += len(value)
+        return value
+
+
+_encode_cache = _EncodeCache(ENCODE_CACHE_BYTES)
+
+
+def _encode_file(filepath):
+    """Base64-encodes a file."""
+    # Encode in fixed-size chunks to bound peak memory for large files
+    out = io.BytesIO()
+    with open(filepath, "rb") as image_file:
+        while chunk := image_file.read(ENCODE_CHUNK_SIZE):
+            out.write(base64.b64encode(chunk))
+    # Base64 output is pure ASCII; decode straight from the buffer
+    # view to skip the UTF-8 validator and the getvalue() copy.
+    return str(out.getbuffer(), "ascii")
+
+
+class StickerAssembler:
+    """
+    Reassembles stickers sent as "sticker_chunk" chat messages.
+    Chunks may arrive out of order or more than once (retransmits).
+    """
+
+    def __init__(self):
+        # (sender, sticker_id) -> [parts, chunks still missing]
+        self._pending = {}
+
+    def add(self, sender, sticker_id, index, total, data):
+        """Stores one chunk; returns the full Base64 text once all have arrived."""
+        # All three come from the peer: anything but an int is dropped
+        # before it can break the comparisons or the dict key
+        if not (type(sticker_id) is int and type(index) is int and type(total) is int):
+            return None
+        if not (0 < total <= MAX_STICKER_CHUNKS and 0 <= index < total):
+            return None
+        key = (sender, sticker_id)
+        entry = self._pending.get(key)
+        if entry is None or len(entry[0]) != total:
+            if len(self._pending) >= MAX_PENDING_STICKERS:
+                # Drop the oldest incomplete sticker to bound memory
+                del self._pending[next(iter(self._pending))]
+            entry = self._pending[key] = [[None] * total, total]
+        parts = entry[0]
+        if parts[index] is None:
+            entry[1] -= 1
+        parts[index] = str(data)
+        if entry[1]:
+            return None
+        del self._pending[key]
+        return "".join(parts)
+
+
+class StickerSink:
+    """
+    Saves incoming stickers to disk (RFC 6.0).
+    Filenames use a per-session timestamp plus a counter, so stickers arriving
+    in the same second never overwrite each other and no clock read is needed
+    per sticker.
+    """
+
+    def __init__(self, directory="."):
+        self.directory = directory
+        self._session = int(time.time())
+        self._counter = 0
+
+    def _next_path(self, sender_name):
+        self._counter += 1
+        # Sender comes from the peer; keep only filename-safe characters
+        safe_sender = _UNSAFE_NAME_CHARS.sub("_", str(sender_name)) or "peer"
+        filename = f"sticker_{safe_sender}_{self._session}_{self._counter}.png"
+        return os.path.join(self.directory, filename)
+
+    def save(self, base64_string, sender_name):
         """
         Decodes incoming sticker data and saves to disk.
+        Returns the saved path, or None on failure.
         """
+        path = None
         try:
-            timestamp = int(time.time())
-            filename = f"sticker_{sender_name}_{timestamp}.png"
+            while True:
+                candidate = self._next_path(sender_name)
+                try:
+                    # O_EXCL: never clobber an existing file
+                    fd = os.open(candidate, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+                    break
+                except FileExistsError:
+                    continue
+            path = candidate
 
-            with open(filename, "wb") as fh:
-                fh.write(base64.b64decode(base64_string))
+            # Decode slice by slice so the full binary never sits in memory
+            # alongside the Base64 text. Each slice is already a large write,
+            # so go unbuffered: a typical sticker is a single write() syscall.
+            with os.fdopen(fd, "wb", buffering=0) as fh:
+                for i in range(0, len(base64_string), DECODE_CHUNK_SIZE):
+                    view = memoryview(
+                        base64.b64decode(base64_string[i : i + DECODE_CHUNK_SIZE])
+                    )
+                    # A raw file may write only part of what it is given
+                    while view:
+                        view = view[fh.write(view) :]
 
-            return filename
+            return path
         except Exception as e:
             print(f"[Chat Error] Could not save sticker: {e}")
+            if path is not None:
+                # Drop the partially written file
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
             return None
@@ -1,6 +1,74 @@
 import csv
-import math
+import logging
+import os
+import pickle
 import random
+from collections import namedtuple
+
+# Parsed Pokemon DB is cached next to the CSVs so later launches skip parsing.
+# Bump DB_CACHE_VERSION whenever the Pokemon class layout changes.
+DB_CACHE_FILE = ".pokemon_db.pkl"
+DB_CACHE_VERSION = 5
+
+logger = logging.getLogger(__name__)
+
+# Type labels in pokemon.csv `against_*` column order. Moves carry an index into
+# this table and each Pokemon a matching effectiveness tuple, so the damage
+# lookup is a tuple index instead of a string-keyed dict lookup.
+TYPES = (
+    "bug",
+    "dark",
+    "dragon",
+    "electric",
+    "fairy",
+    "fight",
+    "fire",
+    "flying",
+    "ghost",
+    "grass",
+    "ground",
+    "ice",
+    "normal",
+    "poison",
+    "psychic",
+    "rock",
+    "steel",
+    "water",
+)
+TYPE_INDEX = {t: i for i, t in enumerate(TYPES)}
+# moves.csv spells the type "fighting" while the CSV column is "against_fight"
+TYPE_INDEX["fighting"] = TYPE_INDEX["fight"]
+# Unknown move types map to a trailing neutral (1.0) slot
+TYPE_UNKNOWN = len(TYPES)
+
+# Move metadata. Indexable like the old (name, power, category, type) tuples.
+Move = namedtuple("Move", ["name", "power", "category", "type", "type_idx"])
+
+
+def make_move(name, power, category, move_type):
+    """Builds a Move, resolving its type index once."""
+    type_idx = TYPE_INDEX.get(move_type, TYPE_UNKNOWN)
+    return Move(name, power, category, move_type, type_idx)
+
+
+def type_effectiveness_table(resistances):
+    """Flattens a resistances dict into a tuple indexed by TYPE_INDEX values."""
+    return tuple(resistances.get(t, 1.0) for t in TYPES) + (1.0,)
+
+
+def effectiveness_ratios(type_eff):
+    """
+    Exact (numerator, denominator) int pairs for a type_eff table.
+    Multipliers are binary fractions (0, 0.25, 0.5, 1, 2, 4), so damage can be
+    computed with integer ceil-division instead of float math plus math.ceil.
+    """
+    return tuple(float(e).as_integer_ratio() for e in type_eff)
+
+
+def _ceil_damage(power, atk, defn, eff_ratio):
+    """ceil(power * atk / defn * eff) in pure integer arithmetic."""
+    num, den = eff_ratio
+    return -(-(power * atk * num) // (defn * den))
 
 
 class Pokemon:
@@ -9,7 +77,26 @@ class Pokemon:
     Stores stats, moves, and handles stat modifications (RFC 5.0).
     """
 
-    def __init__(self, row, available_moves):
+    __slots__ = (
+        "name",
+        "type1",
+        "type2",
+        "hp",
+        "max_hp",
+        "attack",
+        "defense",
+        "sp_attack",
+        "sp_defense",
+        "speed",
+        "resistances",
+        "type_eff",
+        "type_eff_ratio",
+        "moves",
+        "nonce",
+        "stat_boosts",
+    )
+
+    def __init__(self, row, available_moves, against_cols=None):
         self.name = row["name"]
         self.type1 = row["type1"]
         self.type2 = row["type2"] if row["type2"] else None
@@ -24,26 +111,64 @@ class Pokemon:
         self.speed = int(row["speed"])
 
         # Pre-calculated type effectiveness from CSV (optimization for Type1 * Type2)
-        self.resistances = {
-            k.replace("against_", ""): float(v)
-            for k, v in row.items()
-            if k.startswith("against_")
-        }
+        # against_cols: (column, type_label) pairs, resolved once per file by the loader
+        if against_cols is None:
+            against_cols = against_columns(row.keys())
+        self.resistances = {label: float(row[col]) for col, label in against_cols}
+        self.type_eff = type_effectiveness_table(self.resistances)
+        self.type_eff_ratio = effectiveness_ratios(self.type_eff)
 
         if available_moves:
             self.moves = available_moves
         else:
             # Fallback move if database has no entries for this Pokemon
-            self.moves = [("Struggle", 50, "Physical", "normal")]
+            self.moves = [make_move("Struggle", 50, "physical", "normal")]
 
         # RFC Abstract: Speed Tie Resolution
-        # Random nonce generated at setup to deterministically resolve ties.
-        self.nonce = random.randint(0, 1000000)
+        # Random nonce to deterministically resolve ties. Only the Pokemon the
+        # player picks needs one, so it is rolled at setup via roll_nonce().
+        self.nonce = 0
 
         # RFC 5.0: Stat Boosts
         # "An object containing the player's allocation of... special attack and special defense uses."
         self.stat_boosts = {"sp_attack": 2, "sp_defense": 2}
 
+    @classmethod
+    def from_dict(cls, payload):
+        """
+        Rebuilds the opponent's Pokemon from its BATTLE_SETUP payload (RFC 4.2).
+        The peer doesn't share its move list, so `moves` is left empty.
+        """
+        self = cls.__new__(cls)
+        stats = payload.get("stats", {})
+        self.name = payload["name"]
+        self.type1 = payload.get("type1")
+        # The text format carries a missing type2 as the string "None"
+        type2 = payload.get("type2")
+        self.type2 = None if type2 in (None, "", "None") else type2
+        self.hp = int(payload["hp"])
+        self.max_hp = int(payload.get("max_hp", self.hp))
+        self.attack = int(stats.get("attack", 0))
+        self.defense = int(stats.get("defense", 1))
+        self.sp_attack = int(stats.get("sp_attack", 0))
+        self.sp_defense = int(stats.get("sp_defense", 1))
+        self.speed = int(stats.get("speed", 0))
+        # Lowercased once here so damage lookups can skip str.lower()
+        self.resistances = {
+            k.lower(): v for k, v in payload.get("resistances", {}).items()
+        }
+        self.type_eff = type_effectiveness_table(self.resistances)
+        self.type_eff_ratio = effectiveness_ratios(self.type_eff)
+        self.moves = []
+        self.nonce = payload.get("nonce", 0)
+        self.stat_boosts = payload.get("stat_boosts", {})
+        return self
+
+    def roll_nonce(self):
+        """Draws the speed-tie nonce; call once when this Pokemon is chosen."""
+        self.nonce = random.randint(0, 1000000)
+        return self.nonce
+
     def apply_boost(self, stat_name):
         """RFC 5.0: Consumable resource logic for modifying battle stats."""
         current_amount = self.stat_boosts.get(stat_name, 0)
@@ -79,8 +204,16 @@ class Pokemon:
         }
 
 
-def get_effectiveness_text(multiplier):
-    """Returns flavor text based on the type effectiveness multiplier."""
+def against_columns(fieldnames):
+    """Returns (column, type_label) pairs for the CSV's against_* columns."""
+    return [
+        (k, k[len("against_") :].lower())
+        for k in fieldnames
+        if k.startswith("against_")
+    ]
+
+
+def _effectiveness_text(multiplier):
     if multiplier > 1.0:
         return "It was super effective!"
     elif multiplier == 0:
@@ -91,40 +224,65 @@ def get_effectiveness_text(multiplier):
         return ""
 
 
-def calculate_damage(
-    attacker, defender_dict, move_name, move_power, move_category, move_type
-):
+# Multipliers are drawn from a small fixed set, so their text is precomputed
+EFFECTIVENESS_TEXT = {
+    m: _effectiveness_text(m) for m in (0.0, 0.25, 0.5, 1.0, 2.0, 4.0)
+}
+
+
+def get_effectiveness_text(multiplier):
+    """Returns flavor text based on the type effectiveness multiplier."""
+    text = EFFECTIVENESS_TEXT.get(multiplier)
+    if text is None:
+        text = _effectiveness_text(multiplier)
+    return text
+
+
+def calculate_damage(attacker, defender, move):
     """
     RFC 5.0: Damage Calculation Formula.
     Damage = BasePower * (AttackerStat / DefenderStat) * Type1Eff * Type2Eff
+    `move` is a Move; its category is lowercased and type index resolved at load.
     """
-    cat = move_category.lower()
+    cat = move.category
 
     # RFC 5.0: Select stats based on Physical/Special category
     if cat == "physical":
         atk = attacker.attack
-        defn = defender_dict["stats"]["defense"]
+        defn = defender.defense
         stat_label = "Atk/Def"
     else:
         atk = attacker.sp_attack
-        defn = defender_dict["stats"]["sp_defense"]
+        defn = defender.sp_defense
         stat_label = "SpAtk/SpDef"
 
     # RFC 5.0: Type Effectiveness (Product of Type1 and Type2 effectiveness)
     # Note: 'resistances' from CSV already contains the pre-calculated product.
-    effectiveness = defender_dict["resistances"].get(move_type.lower(), 1.0)
-
-    # The Core Formula
-    ratio = atk / defn
-    raw_damage = float(move_power) * ratio * effectiveness
-    final_damage = math.ceil(raw_damage)
+    effectiveness = defender.type_eff[move.type_idx]
 
-    print(f"\n   [Math] Move: {move_name} ({cat})")
-    print(f"   [Math] Stats ({stat_label}): {atk} / {defn} = {ratio:.2f}")
-    print(
-        f"   [Math] Formula: {move_power} * {ratio:.2f} * {effectiveness} = {raw_damage:.2f}"
+    # The Core Formula, as exact integer ceil-division
+    final_damage = _ceil_damage(
+        move.power, atk, defn, defender.type_eff_ratio[move.type_idx]
     )
-    print(f"   [Math] Final Damage: {final_damage}")
+
+    # Diagnostic breakdown; only computed when DEBUG logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        ratio = atk / defn
+        logger.debug(
+            "[Math] Move: %s (%s) | Stats (%s): %s / %s = %.2f"
+            " | Formula: %s * %.2f * %s = %.2f | Final Damage: %s",
+            move.name,
+            cat,
+            stat_label,
+            atk,
+            defn,
+            ratio,
+            move.power,
+            ratio,
+            effectiveness,
+            move.power * ratio * effectiveness,
+            final_damage,
+        )
 
     return final_damage, effectiveness
 
@@ -133,38 +291,89 @@ def load_moves_map(filename="assets/moves.csv"):
     """Parses moves.csv to create a mapping of Pokemon -> List of Moves."""
     moves_map = {}
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        with open(filename, "r", encoding="utf-8", newline="") as f:
+            # Plain csv.reader yields lists; resolve column positions once from
+            # the header instead of building a dict per row like DictReader.
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return moves_map
+            i_name = header.index("move_name")
+            i_type = header.index("type")
+            i_power = header.index("base_power")
+            i_cat = header.index("damage_category")
+            i_learn = header.index("learns_by_pokemon")
             for row in reader:
-                m_name = row["move_name"]
-                m_type = row["type"]
-                m_power = int(row["base_power"])
-                m_cat = row["damage_category"]
-                learners = row["learns_by_pokemon"].split(";")
-                move_tuple = (m_name, m_power, m_cat, m_type)
-                for pokemon in learners:
+                if not row:
+                    continue
+                # Category and type are lowercased once here, not per attack
+                move_tuple = make_move(
+                    row[i_name],
+                    int(row[i_power]),
+                    row[i_cat].lower(),
+                    row[i_type].lower(),
+                )
+                for pokemon in row[i_learn].split(";"):
                     p_name = pokemon.strip().lower()
-                    if p_name not in moves_map:
-                        moves_map[p_name] = []
-                    moves_map[p_name].append(move_tuple)
+                    moves_map.setdefault(p_name, []).append(move_tuple)
     except FileNotFoundError:
         print(f"[Error] Could not find {filename}")
         pass
     return moves_map
 
 
-def load_pokemon_db(poke_file="assets/pokemon.csv", moves_file="assets/moves.csv"):
-    """Loads all Pokemon data and links moves to them."""
+def _parse_pokemon_db(poke_file, moves_file):
+    """Parses the Pokemon and moves CSVs into a name -> Pokemon mapping."""
     moves_map = load_moves_map(moves_file)
     db = {}
     try:
         with open(poke_file, "r", encoding="utf-8") as f:
             reader = csv.DictReader(f)
+            against_cols = against_columns(reader.fieldnames or [])
             for row in reader:
                 p_name = row["name"].lower()
                 p_moves = moves_map.get(p_name, [])
-                p = Pokemon(row, p_moves)
+                p = Pokemon(row, p_moves, against_cols)
                 db[p_name] = p
     except FileNotFoundError:
         print(f"[Error] Could not find {poke_file}")
     return db
+
+
+def _db_cache_key(poke_file, moves_file):
+    """Identifies the CSV inputs by path, mtime and size."""
+    key = [DB_CACHE_VERSION]
+    for path in (poke_file, moves_file):
+        st = os.stat(path)
+        key.append((os.path.abspath(path), st.st_mtime_ns, st.st_size))
+    return tuple(key)
+
+
+def load_pokemon_db(poke_file="assets/pokemon.csv", moves_file="assets/moves.csv"):
+    """
+    Loads all Pokemon data and links moves to them.
+    Uses a pickle cache keyed on the CSV files so repeated launches skip parsing.
+    """
+    try:
+        key = _db_cache_key(poke_file, moves_file)
+    except OSError:
+        # Missing CSV: let the parser report it
+        return _parse_pokemon_db(poke_file, moves_file)
+
+    cache_path = os.path.join(os.path.dirname(poke_file), DB_CACHE_FILE)
+    try:
+        with open(cache_path, "rb") as f:
+            cached_key, db = pickle.load(f)
+        if cached_key == key:
+            return db
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        pass
+
+    db = _parse_pokemon_db(poke_file, moves_file)
+    if db:
+        try:
+            with open(cache_path, "wb") as f:
+                pickle.dump((key, db), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            pass
+    return db
@@ -1,42 +1,220 @@
-import queue
+import collections
+import itertools
+import os
 import random
+import selectors
 import sys
 import threading
-import time
-
-from game.chat_utils import ChatManager
-from game.game_data import calculate_damage, get_effectiveness_text, load_pokemon_db
+from concurrent.futures import ThreadPoolExecutor
+
+from game.chat_utils import (
+    MAX_STICKER_CHUNKS,
+    STICKER_CHUNK_SIZE,
+    ChatManager,
+    StickerAssembler,
+    StickerSink,
+)
+from game.game_data import (
+    Pokemon,
+    calculate_damage,
+    get_effectiveness_text,
+    load_pokemon_db,
+)
 
 # Import project modules
 from networking.network import DiscoveryManager, ReliableTransport
 
+# Pokemon names shown per page by the 'list' command
+POKEMON_LIST_PAGE_SIZE = 20
+
+# Typed commands, compared against normalize_input() output
+CMD_LIST = "list"
+CMD_QUIT = "q"
+
+
+# Menus, each rendered with one format call and written in one go
+MAIN_MENU = (
+    "\n=== POKE PROTOCOL BATTLE ===\n"
+    "[1] Host Game (Direct & Broadcast)\n"
+    "[2] Join Game (Direct IP)\n"
+    "[3] Scan for Games (Broadcast)\n"
+)
+ACTION_MENU = "\n[{name} (HP: {hp})] Select Action:\n[1] Attack\n[2] Use Boost Item\n"
+BOOST_MENU = (
+    "\nAvailable Boosts:\n"
+    "[1] X Special Attack (Left: {sp_attack})\n"
+    "[2] X Special Defense (Left: {sp_defense})\n"
+    "[3] Cancel\n"
+)
+BANNER_RULE = "*" * 46
+
+# RFC 4.0 handshake steps: message types wait_for_packet() accepts at each one
+EXPECT_ATTACK = frozenset(("ATTACK_ANNOUNCE", "GAME_OVER"))
+EXPECT_DEFENSE = frozenset(("DEFENSE_ANNOUNCE",))
+EXPECT_REPORT = frozenset(("CALCULATION_REPORT",))
+EXPECT_CONFIRM = frozenset(("CALCULATION_CONFIRM",))
+
+
+def normalize_input(text):
+    """Canonical form of a typed line for command/name matching."""
+    return text.strip().lower()
+
+
+class NotifiableDeque:
+    """
+    Single-consumer channel: a deque plus an Event for wakeups.
+    Cheaper than queue.Queue, whose Condition and lock dominate per-item cost;
+    deque append/popleft are already atomic in CPython.
+    """
+
+    def __init__(self):
+        self.dq = collections.deque()
+        self.ev = threading.Event()
+
+    def append(self, item):
+        self.dq.append(item)
+        self.ev.set()
+
+    def drain_all(self):
+        """Pops and returns every queued item in one pass."""
+        items = []
+        try:
+            while True:
+                items.append(self.dq.popleft())
+        except IndexError:
+            return items
+
+    def pop_wait(self, timeout=None):
+        """Pops the oldest item, waiting up to `timeout` seconds; None if empty."""
+        try:
+            return self.dq.popleft()
+        except IndexError:
+            pass
+        # Clear, then re-check: an append racing with us re-sets the event,
+        # so a wakeup is never lost.
+        self.ev.clear()
+        try:
+            return self.dq.popleft()
+        except IndexError:
+            pass
+        if timeout == 0:
+            return None
+        self.ev.wait(timeout)
+        try:
+            return self.dq.popleft()
+        except IndexError:
+            return None
+
 
 class InputListener:
-    """Helper class for non-blocking console input to allow Async Chat (RFC 6.0)."""
+    """
+    Helper class for non-blocking console input to allow Async Chat (RFC 6.0).
+    On POSIX, stdin is watched with a selector so waiting for input costs no
+    extra thread and wakes as soon as a line arrives. Windows consoles are not
+    selectable, so there a daemon thread feeds lines through a queue instead.
+    Other threads call wake() to cut a blocking wait short, which lets the game
+    wait on keyboard input and network events in a single blocking call.
+    """
 
     def __init__(self):
-        self.input_queue = queue.Queue()
         self.running = True
-        self.thread = threading.Thread(target=self._loop, daemon=True)
-        self.thread.start()
+        if sys.platform == "win32":
+            self.selector = None
+            self.input_queue = NotifiableDeque()
+            self.thread = threading.Thread(target=self._loop, daemon=True)
+            self.thread.start()
+        else:
+            # SelectSelector works for ttys, pipes and regular files alike
+            # (epoll rejects regular files, kqueue rejects some ttys).
+            self.fd = sys.stdin.fileno()
+            self.selector = selectors.SelectSelector()
+            self.selector.register(self.fd, selectors.EVENT_READ)
+            # Self-pipe: a byte written by wake() makes select() return
+            self.wake_r, self.wake_w = os.pipe()
+            os.set_blocking(self.wake_r, False)
+            os.set_blocking(self.wake_w, False)
+            self.selector.register(self.wake_r, selectors.EVENT_READ)
+            self.lines = collections.deque()  # complete lines not yet consumed
+            self.partial = b""
+            self.eof = False
 
     def _loop(self):
+        # Windows only. readline() rather than input(): no prompt handling or
+        # stdout flush per line. It blocks, but as a daemon thread it won't
+        # prevent the main program from exiting.
         while self.running:
             try:
-                # This blocks waiting for input, but since it's a daemon thread,
-                # it won't prevent the main program from exiting if we let it.
-                text = input()
-                self.input_queue.put(text)
-            except EOFError:
-                break
+                text = sys.stdin.readline()
             except Exception:
                 break
+            if not text:
+                break  # EOF
+            self.input_queue.append(text.rstrip("\r\n"))
+
+    def _read_stdin(self):
+        """Reads whatever is available on stdin and splits it into lines."""
+        data = os.read(self.fd, 4096)
+        if not data:
+            self.eof = True
+            self.selector.unregister(self.fd)
+            if self.partial:
+                self.lines.append(self.partial.decode("utf-8", "replace"))
+                self.partial = b""
+            return
+        *complete, self.partial = (self.partial + data).split(b"\n")
+        for line in complete:
+            self.lines.append(line.decode("utf-8", "replace").rstrip("\r"))
+
+    def _poll(self, timeout):
+        """POSIX: waits up to `timeout` for stdin or a wakeup and buffers lines."""
+        for key, _ in self.selector.select(timeout):
+            if key.fd == self.wake_r:
+                try:
+                    os.read(self.wake_r, 4096)
+                except BlockingIOError:
+                    pass
+            else:
+                self._read_stdin()
+
+    def _next_line(self, timeout):
+        if self.selector is None:
+            # A None item is a wake() marker and reads as "no input"
+            return self.input_queue.pop_wait(timeout)
+
+        if not self.lines:
+            self._poll(timeout)
+        return self.lines.popleft() if self.lines else None
+
+    def drain(self):
+        """Returns every input line available right now, without waiting."""
+        if self.selector is None:
+            return [line for line in self.input_queue.drain_all() if line is not None]
+        self._poll(0)
+        lines = list(self.lines)
+        self.lines.clear()
+        return lines
 
     def get_input(self):
+        """Returns the next input line if one is ready, else None."""
+        return self._next_line(0)
+
+    def get_blocking(self, timeout=None):
+        """
+        Waits for the next input line and returns it.
+        Returns None after `timeout` seconds (None waits indefinitely) or as
+        soon as another thread calls wake().
+        """
+        return self._next_line(timeout)
+
+    def wake(self):
+        """Interrupts a get_blocking() call in progress on another thread."""
+        if self.selector is None:
+            self.input_queue.append(None)
+            return
         try:
-            return self.input_queue.get_nowait()
-        except queue.Empty:
-            return None
+            os.write(self.wake_w, b"\0")
+        except BlockingIOError:
+            pass  # pipe full: a wakeup is already pending
 
 
 class P2PGame:
@@ -48,6 +226,12 @@ class P2PGame:
     def __init__(self):
         self.net = None
         self.pokemon_db = load_pokemon_db()
+        # 'list' output never changes, so sort, title-case and page it once
+        names = [f"  {name.title()}" for name in sorted(self.pokemon_db)]
+        self.pokemon_list_pages = [
+            "\n".join(names[i : i + POKEMON_LIST_PAGE_SIZE])
+            for i in range(0, len(names), POKEMON_LIST_PAGE_SIZE)
+        ]
         self.running = True
         self.input_handler = InputListener()
 
@@ -56,18 +240,45 @@ class P2PGame:
         self.state = "LOBBY"
         self.turn_owner = None
 
-        self.battle_queue = queue.Queue()
+        # Signalled by the network thread so the main loop wakes on state changes
+        self.handshake_done = threading.Event()  # LOBBY -> SETUP
+        self.opp_ready = threading.Event()  # opponent's BATTLE_SETUP received
+
+        # Network thread -> main thread channel for turn-sequence messages
+        self.battle_queue = NotifiableDeque()
+
+        # Outbound turn payloads, refilled in place every turn. send_reliable
+        # serializes immediately, so reusing them between sends is safe.
+        self.attack_announce = {
+            "move_name": "",
+            "base_power": 0,
+            "damage_category": "",
+            "move_type": "",
+        }
+        self.calculation_report = {
+            "attacker": "",
+            "move_used": "",
+            "remaining_health": 0,
+            "damage_dealt": 0,
+            "defender_hp_remaining": 0,
+            "status_message": "",
+        }
+        self.defense_announce = {"hp": 0, "status": "ready"}
+        self.calculation_confirm = {}
         self.pending_damage = 0
         self.discovery = DiscoveryManager(game_port=8888)
+        self.sticker_sink = StickerSink()
+        self.sticker_assembler = StickerAssembler()
+        self.sticker_ids = itertools.count(1)
+        # Sticker file I/O + Base64 (both directions) runs here so large images
+        # stall neither the game loop nor the network listener
+        self.io_pool = ThreadPoolExecutor(max_workers=1)
 
     def start(self):
-        print("\n=== POKE PROTOCOL BATTLE ===")
-        print("[1] Host Game (Direct & Broadcast)")
-        print("[2] Join Game (Direct IP)")
-        print("[3] Scan for Games (Broadcast)")
+        sys.stdout.write(MAIN_MENU)
 
         while True:
-            choice = self.input_handler.get_input()
+            choice = self.input_handler.get_blocking()
             if choice:
                 choice = choice.strip()
                 if choice == "1":
@@ -81,7 +292,6 @@ class P2PGame:
                     break
                 else:
                     print("Invalid choice.")
-            time.sleep(0.1)
 
         print(
             "\n[Tip] Type '/chat <message>' to chat or '/sticker <path/to/file>' to send a sticker. Preset stickers are available in the 'stickers/' folder."
@@ -90,7 +300,7 @@ class P2PGame:
         while self.running:
             try:
                 if self.state == "LOBBY":
-                    time.sleep(1)
+                    self.handshake_done.wait(timeout=1)
                 elif self.state == "SETUP":
                     self.perform_setup()
                 elif self.state == "BATTLE":
@@ -99,26 +309,25 @@ class P2PGame:
                 break
 
         if self.net:
-            self.net.running = False
+            self.net.stop()
         self.discovery.stop_broadcast()
+        self.io_pool.shutdown(wait=False)
 
     # --- NEW METHOD: Safe Exit Wait ---
     def wait_for_exit(self):
         """
         Waits for the user to press Enter before closing the window.
-        Reuses the existing input thread to avoid race conditions with standard input().
+        Reuses the shared input handler to avoid races with a separate standard input().
         """
         print("\nPress Enter to exit...")
 
         # 1. Flush any leftover input (e.g., keys pressed during Game Over screen)
-        while self.input_handler.get_input() is not None:
-            pass
+        self.input_handler.drain()
 
         # 2. Wait for a fresh keypress
         while True:
-            if self.input_handler.get_input() is not None:
+            if self.input_handler.get_blocking() is not None:
                 break
-            time.sleep(0.1)
 
     def role_host(self):
         print(f"[Host] Starting on port 8888...")
@@ -132,11 +341,10 @@ class P2PGame:
         self.net.start(self.handle_message)
         print("Enter Host IP (127.0.0.1):")
         while True:
-            ip_in = self.input_handler.get_input()
+            ip_in = self.input_handler.get_blocking()
             if ip_in is not None:
                 ip = ip_in.strip() or "127.0.0.1"
                 break
-            time.sleep(0.1)
         self.net.set_peer(ip, 8888)
         # RFC 3.1: Connection Establishment (Handshake)
         self.net.send_reliable("HANDSHAKE_REQUEST", {})
@@ -151,118 +359,150 @@ class P2PGame:
             ip = "127.0.0.1"
         else:
             print("\nAvailable Games:")
-            ips = list(found.keys())
-            for i, ip in enumerate(ips):
-                print(f"[{i + 1}] {ip}")
-            print("Select Game # > ")
-            while True:
-                sel = self.input_handler.get_input()
-                if sel:
-                    try:
-                        idx = int(sel) - 1
-                        if 0 <= idx < len(ips):
-                            ip = ips[idx]
-                            break
-                        else:
-                            print("Invalid number.")
-                    except:
-                        pass
-                time.sleep(0.1)
+            ips = list(found)
+            sys.stdout.write(
+                "".join(f"[{i}] {ip}\n" for i, ip in enumerate(ips, 1))
+                + "Select Game # > \n"
+            )
+            # No peer yet, so chat commands aren't available here
+            ip = ips[self.prompt_choice(len(ips), allow_chat=False)]
 
         self.net.set_peer(ip, 8888)
         # RFC 3.1: Connection Establishment
         self.net.send_reliable("HANDSHAKE_REQUEST", {})
 
+    def _send_chat_text(self, msg):
+        # RFC 6.0: Chat Message Format
+        self.net.send_reliable(
+            "CHAT_MESSAGE", {"sender": "Player", "type": "text", "content": msg}
+        )
+        print(f"[Me]: {msg}")
+
+    def _send_sticker(self, arg):
+        # Encoding and the bulk sends, which may wait on the send window,
+        # both happen on the io_pool worker, never on the game loop
+        self.io_pool.submit(self._encode_and_send_sticker, arg.strip())
+
+    def _encode_and_send_sticker(self, filepath):
+        b64_data = ChatManager.encode_image(filepath)
+        if not b64_data:
+            return
+        if len(b64_data) <= STICKER_CHUNK_SIZE:
+            print(f"[System] Sending sticker ({len(b64_data)} bytes)...")
+            self.net.send_reliable(
+                "CHAT_MESSAGE",
+                {"sender": "Player", "type": "sticker", "content": b64_data},
+                bulk=True,
+            )
+            return
+        # Too big for one datagram: send it in reassemblable pieces
+        chunks = ChatManager.split_sticker(b64_data)
+        if len(chunks) > MAX_STICKER_CHUNKS:
+            # The peer would discard every chunk of it
+            limit = MAX_STICKER_CHUNKS * STICKER_CHUNK_SIZE
+            print(
+                f"[Chat Error] Sticker too large ({len(b64_data)} bytes)! Max is {limit}."
+            )
+            return
+        print(f"[System] Sending sticker ({len(b64_data)} bytes)...")
+        sticker_id = next(self.sticker_ids)
+        for index, chunk in enumerate(chunks):
+            self.net.send_reliable(
+                "CHAT_MESSAGE",
+                {
+                    "sender": "Player",
+                    "type": "sticker_chunk",
+                    "sticker_id": sticker_id,
+                    "chunk_index": index,
+                    "chunk_total": len(chunks),
+                    "content": chunk,
+                },
+                bulk=True,
+            )
+
+    # Chat command -> handler, looked up once per input line
+    CHAT_COMMANDS = {
+        "/chat": _send_chat_text,
+        "/sticker": _send_sticker,
+    }
+
     def handle_chat_input(self, user_input):
         if not user_input:
             return False
-        if user_input.startswith("/chat "):
-            msg = user_input[6:]
-            # RFC 6.0: Chat Message Format
-            self.net.send_reliable(
-                "CHAT_MESSAGE", {"sender": "Player", "type": "text", "content": msg}
-            )
-            print(f"[Me]: {msg}")
-            return True
-        elif user_input.startswith("/sticker "):
-            filepath = user_input[9:].strip()
-            b64_data = ChatManager.encode_image(filepath)
-            if b64_data:
-                print(f"[System] Sending sticker ({len(b64_data)} bytes)...")
-                self.net.send_reliable(
-                    "CHAT_MESSAGE",
-                    {"sender": "Player", "type": "sticker", "content": b64_data},
-                )
-            return True
-        return False
+        cmd, sep, rest = user_input.partition(" ")
+        handler = self.CHAT_COMMANDS.get(cmd) if sep else None
+        if handler is None:
+            return False
+        handler(self, rest)
+        return True
 
-    def print_stats(self, p_data, is_mine=False):
+    def print_stats(self, pokemon, is_mine=False):
         owner = "YOUR POKEMON" if is_mine else "OPPONENT POKEMON"
-        if hasattr(p_data, "to_dict"):
-            p_data = p_data.to_dict()
-
-        print(f"\n{'=' * 10} {owner} {'=' * 10}")
-        print(f"Name:      {p_data['name'].upper()}")
-        print(f"HP:        {p_data['hp']} / {p_data['max_hp']}")
-        type_str = p_data["type1"]
-        if p_data["type2"]:
-            type_str += f" / {p_data['type2']}"
-        print(f"Type:      {type_str}")
-        s = p_data["stats"]
-        print(f"Attack:    {s['attack']:<5} Sp. Atk: {s['sp_attack']}")
-        print(f"Defense:   {s['defense']:<5} Sp. Def: {s['sp_defense']}")
-        print(f"Speed:     {s['speed']}")
-        boosts = p_data.get("stat_boosts", {})
+        type_str = pokemon.type1
+        if pokemon.type2:
+            type_str += f" / {pokemon.type2}"
+        # Build the whole card and emit it with a single write
+        lines = [
+            f"\n{'=' * 10} {owner} {'=' * 10}",
+            f"Name:      {pokemon.name.upper()}",
+            f"HP:        {pokemon.hp} / {pokemon.max_hp}",
+            f"Type:      {type_str}",
+            f"Attack:    {pokemon.attack:<5} Sp. Atk: {pokemon.sp_attack}",
+            f"Defense:   {pokemon.defense:<5} Sp. Def: {pokemon.sp_defense}",
+            f"Speed:     {pokemon.speed}",
+        ]
+        boosts = pokemon.stat_boosts
         if boosts:
-            print(
-                f"Boosts:    Sp.Atk ({boosts.get('sp_attack', 0)}) | Sp.Def ({boosts.get('sp_defense', 0)})"
+            get = boosts.get
+            lines.append(
+                f"Boosts:    Sp.Atk ({get('sp_attack', 0)}) | Sp.Def ({get('sp_defense', 0)})"
             )
-        print("=" * 34)
+        lines.append("=" * 34)
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def show_pokemon_list(self):
-        names = sorted(list(self.pokemon_db.keys()))
-        page_size = 20
-        total = len(names)
-        print(f"\n--- Available Pokemon ({total}) ---")
-        for i in range(0, total, page_size):
-            chunk = names[i : i + page_size]
-            for name in chunk:
-                print(f"  {name.title()}")
-            if i + page_size < total:
-                print(f"\n-- Press ENTER for next page (or type 'q' to stop) --")
-                stop_listing = False
-                while True:
-                    user_in = self.input_handler.get_input()
-                    if user_in is not None:
-                        if self.handle_chat_input(user_in):
-                            continue
-                        if user_in.strip().lower() == "q":
-                            stop_listing = True
-                        break
-                    time.sleep(0.1)
-                if stop_listing:
-                    break
-        print("--- End of List ---")
-        print("Enter Pokemon Name (or 'list'): ")
+        pages = self.pokemon_list_pages
+        # Each page goes out in a single write together with its header/prompt
+        out = f"\n--- Available Pokemon ({len(self.pokemon_db)}) ---\n"
+        for page_no, page in enumerate(pages, 1):
+            out += page + "\n"
+            if page_no == len(pages):
+                break
+            sys.stdout.write(
+                out + "\n-- Press ENTER for next page (or type 'q' to stop) --\n"
+            )
+            out = ""
+            # One blocking read; only chat commands (or a wakeup) ask again
+            user_in = self.input_handler.get_blocking()
+            while user_in is None or self.handle_chat_input(user_in):
+                user_in = self.input_handler.get_blocking()
+            if normalize_input(user_in) == CMD_QUIT:
+                break
+        sys.stdout.write(
+            out + "--- End of List ---\nEnter Pokemon Name (or 'list'): \n"
+        )
 
     def perform_setup(self):
         if self.my_pokemon is not None:
             return
         self.discovery.stop_broadcast()
 
-        print("\n--- Choose your Pokemon ---")
-        print("Enter Pokemon Name (e.g. Charmander) or type 'list': ")
+        sys.stdout.write(
+            "\n--- Choose your Pokemon ---\n"
+            "Enter Pokemon Name (e.g. Charmander) or type 'list': \n"
+        )
         while True:
-            user_in = self.input_handler.get_input()
+            user_in = self.input_handler.get_blocking()
             if user_in:
                 if self.handle_chat_input(user_in):
                     continue
-                name = user_in.strip().lower()
-                if name == "list":
+                name = normalize_input(user_in)
+                if name == CMD_LIST:
                     self.show_pokemon_list()
                     continue
                 if name in self.pokemon_db:
                     self.my_pokemon = self.pokemon_db[name]
+                    self.my_pokemon.roll_nonce()
                     self.print_stats(self.my_pokemon, is_mine=True)
                     # RFC 4.2: Battle Setup - Exchange Pokemon Data
                     self.net.send_reliable("BATTLE_SETUP", self.my_pokemon.to_dict())
@@ -270,16 +510,17 @@ class P2PGame:
                     break
                 else:
                     print("Invalid name. Type 'list' to see options.")
-            time.sleep(0.1)
 
-        while self.opp_pokemon is None and self.running:
-            self.check_input_queue_for_chat()
-            time.sleep(0.1)
+        # _on_battle_setup wakes the input wait, so this blocks without polling
+        while self.running and not self.opp_ready.is_set():
+            user_in = self.input_handler.get_blocking()
+            if user_in and not self.handle_chat_input(user_in):
+                print(f"[System] Not your turn!")
 
         if self.running:
             self.print_stats(self.opp_pokemon, is_mine=False)
             print(
-                f"\n[Battle Ready] {self.my_pokemon.name} VS {self.opp_pokemon['name']}"
+                f"\n[Battle Ready] {self.my_pokemon.name} VS {self.opp_pokemon.name}"
             )
             self.determine_first_turn()
             self.state = "BATTLE"
@@ -289,42 +530,27 @@ class P2PGame:
         RFC Abstract: Turn Order Determination.
         Uses Speed stat, then Nonce for tie-breaking.
         """
-        my_speed = self.my_pokemon.speed
-        opp_speed = self.opp_pokemon["stats"]["speed"]
-        my_nonce = self.my_pokemon.nonce
-        opp_nonce = self.opp_pokemon.get("nonce", 0)
-
-        if my_speed > opp_speed:
+        me = self.my_pokemon
+        opp = self.opp_pokemon
+        # Lexicographic compare: the nonce only decides a Speed tie
+        if (me.speed, me.nonce) > (opp.speed, opp.nonce):
             self.turn_owner = "me"
-        elif opp_speed > my_speed:
-            self.turn_owner = "opp"
         else:
-            self.turn_owner = "me" if my_nonce > opp_nonce else "opp"
+            self.turn_owner = "opp"
         print(
             f"[System] Result -> {'My' if self.turn_owner == 'me' else 'Opponent'} Turn"
         )
 
-    def check_input_queue_for_chat(self):
-        while True:
-            user_in = self.input_handler.get_input()
-            if user_in:
-                if not self.handle_chat_input(user_in):
-                    print(f"[System] Not your turn!")
-            else:
-                break
-
     def check_game_over(self):
-        if self.my_pokemon.hp < 0:
-            self.my_pokemon.hp = 0
-        if self.opp_pokemon["hp"] < 0:
-            self.opp_pokemon["hp"] = 0
-
-        if self.my_pokemon.hp <= 0:
+        me = self.my_pokemon
+        opp = self.opp_pokemon
+        # HP is clamped with max(0, ...) wherever damage is applied
+        if me.hp <= 0:
             print("\n=== GAME OVER: YOU FAINTED! ===")
-            self.net.send_reliable("GAME_OVER", {"winner": self.opp_pokemon["name"]})
+            self.net.send_reliable("GAME_OVER", {"winner": opp.name})
             self.running = False
             return True
-        if self.opp_pokemon["hp"] <= 0:
+        if opp.hp <= 0:
             print("\n=== GAME OVER: YOU WON! ===")
             self.running = False
             return True
@@ -339,147 +565,139 @@ class P2PGame:
             self.play_opp_turn()
 
     def play_my_turn(self):
-        print(f"\n[{self.my_pokemon.name} (HP: {self.my_pokemon.hp})] Select Action:")
-        print("[1] Attack")
-        print("[2] Use Boost Item")
+        sys.stdout.write(
+            ACTION_MENU.format(name=self.my_pokemon.name, hp=self.my_pokemon.hp)
+        )
 
         while self.running:
-            user_in = self.input_handler.get_input()
+            user_in = self.input_handler.get_blocking()
             if user_in:
                 if self.handle_chat_input(user_in):
                     continue
-                if user_in.strip() == "1":
+                ch = user_in.strip()
+                if ch == "1":
                     self.menu_attack()
                     return
-                elif user_in.strip() == "2":
+                elif ch == "2":
                     if self.menu_boost():
                         return
                     else:
                         print("Select Action: [1] Attack, [2] Boost")
-            time.sleep(0.1)
 
     def menu_boost(self):
-        print("\nAvailable Boosts:")
-        print(
-            f"[1] X Special Attack (Left: {self.my_pokemon.stat_boosts['sp_attack']})"
-        )
-        print(
-            f"[2] X Special Defense (Left: {self.my_pokemon.stat_boosts['sp_defense']})"
-        )
-        print("[3] Cancel")
+        sys.stdout.write(BOOST_MENU.format_map(self.my_pokemon.stat_boosts))
         while self.running:
-            user_in = self.input_handler.get_input()
+            user_in = self.input_handler.get_blocking()
             if user_in:
                 if self.handle_chat_input(user_in):
                     continue
                 ch = user_in.strip()
                 if ch == "1":
                     if self.my_pokemon.apply_boost("sp_attack"):
-                        self.execute_attack_sequence(
-                            None, is_boost=True, boost_msg="used X Special Attack!"
-                        )
+                        self.execute_boost("used X Special Attack!")
                         return True
                     else:
                         print("No boosts left!")
                 elif ch == "2":
                     if self.my_pokemon.apply_boost("sp_defense"):
-                        self.execute_attack_sequence(
-                            None, is_boost=True, boost_msg="used X Special Defense!"
-                        )
+                        self.execute_boost("used X Special Defense!")
                         return True
                     else:
                         print("No boosts left!")
                 elif ch == "3":
                     return False
-            time.sleep(0.1)
 
     def menu_attack(self):
-        print("Select Move:")
+        menu = ["Select Move:"]
         for i, move in enumerate(self.my_pokemon.moves):
-            print(f"{i + 1}. {move[0]} (Pwr: {move[1]}, Type: {move[2]})")
+            menu.append(f"{i + 1}. {move[0]} (Pwr: {move[1]}, Type: {move[2]})")
+        sys.stdout.write("\n".join(menu) + "\n")
+        choice = self.prompt_choice(len(self.my_pokemon.moves))
+        if choice is not None:
+            self.execute_move(self.my_pokemon.moves[choice])
+
+    def prompt_choice(self, count, allow_chat=True):
+        """
+        Blocks until the user picks one of `count` numbered options (1-based)
+        and returns its 0-based index, or None if the game stops first.
+        """
         while self.running:
-            user_in = self.input_handler.get_input()
-            if user_in:
-                if self.handle_chat_input(user_in):
-                    continue
-                try:
-                    choice = int(user_in) - 1
-                    if 0 <= choice < len(self.my_pokemon.moves):
-                        self.execute_attack_sequence(self.my_pokemon.moves[choice])
-                        return
-                    else:
-                        print("Invalid selection.")
-                except ValueError:
-                    pass
-            time.sleep(0.1)
+            user_in = self.input_handler.get_blocking()
+            if not user_in:
+                continue
+            if allow_chat and self.handle_chat_input(user_in):
+                continue
+            try:
+                choice = int(user_in) - 1
+            except ValueError:
+                continue
+            if 0 <= choice < count:
+                return choice
+            print("Invalid selection.")
+        return None
+
+    def execute_move(self, move):
+        me = self.my_pokemon
+        dmg, eff = calculate_damage(me, self.opp_pokemon, move)
+        status_msg = f"{me.name} used {move.name}! {get_effectiveness_text(eff)}"
+        self.execute_attack_sequence(
+            move.name, move.power, move.category, move.type, dmg, status_msg
+        )
 
-    def execute_attack_sequence(self, move, is_boost=False, boost_msg=""):
+    def execute_boost(self, boost_msg):
+        # Boosts travel as a zero-power Status move
+        status_msg = f"{self.my_pokemon.name} {boost_msg}"
+        self.execute_attack_sequence(boost_msg, 0, "Status", "normal", 0, status_msg)
+
+    def execute_attack_sequence(
+        self, move_name, power, category, m_type, dmg, status_msg
+    ):
         """
         RFC 4.0: 4-Way Handshake Implementation.
         Sequence: ATTACK -> DEFENSE -> CALCULATION -> CONFIRM.
         """
-        move_name = boost_msg if is_boost else move[0]
-        power = 0 if is_boost else move[1]
-        category = "Status" if is_boost else move[2]
-        m_type = "normal" if is_boost else move[3]
-
         # STEP 1: RFC 4.5 Attack Announce
         print(f"[RFC] Sending ATTACK_ANNOUNCE...")
-        self.net.send_reliable(
-            "ATTACK_ANNOUNCE",
-            {
-                "move_name": move_name,
-                "base_power": power,
-                "damage_category": category,
-                "move_type": m_type,
-            },
-        )
+        announce = self.attack_announce
+        announce["move_name"] = move_name
+        announce["base_power"] = power
+        announce["damage_category"] = category
+        announce["move_type"] = m_type
+        self.net.send_reliable("ATTACK_ANNOUNCE", announce)
+
+        # Build the RFC 4.7 report while the defender replies; nothing in it
+        # depends on DEFENSE_ANNOUNCE, so STEP 3 is a bare send.
+        self.pending_damage = dmg
+        new_opp_hp = max(0, self.opp_pokemon.hp - dmg)
+
+        report = self.calculation_report
+        report["attacker"] = self.my_pokemon.name
+        report["move_used"] = move_name
+        report["remaining_health"] = self.my_pokemon.hp
+        report["damage_dealt"] = dmg
+        report["defender_hp_remaining"] = new_opp_hp
+        report["status_message"] = status_msg
 
         # STEP 2: RFC 4.6 Defense Announce (Wait)
-        self.wait_for_packet(["DEFENSE_ANNOUNCE"])
+        self.wait_for_packet(EXPECT_DEFENSE)
 
         # STEP 3: RFC 4.7 Calculation Report
-        if is_boost:
-            dmg, eff = 0, 1.0
-            status_msg = f"{self.my_pokemon.name} {boost_msg}"
-        else:
-            dmg, eff = calculate_damage(
-                self.my_pokemon, self.opp_pokemon, move_name, power, category, m_type
-            )
-            status_msg = f"{self.my_pokemon.name} used {move_name}! {get_effectiveness_text(eff)}"
-
-        self.pending_damage = dmg
-        new_opp_hp = max(0, self.opp_pokemon["hp"] - dmg)
-
         print(f"[RFC] Sending CALCULATION_REPORT ({dmg} dmg)...")
-        self.net.send_reliable(
-            "CALCULATION_REPORT",
-            {
-                "attacker": self.my_pokemon.name,
-                "move_used": move_name,
-                "remaining_health": self.my_pokemon.hp,
-                "damage_dealt": dmg,
-                "defender_hp_remaining": new_opp_hp,
-                "status_message": status_msg,
-            },
-        )
+        self.net.send_reliable("CALCULATION_REPORT", report)
 
         # STEP 4: RFC 4.8 Calculation Confirm (Wait)
-        self.wait_for_packet(["CALCULATION_CONFIRM"])
+        self.wait_for_packet(EXPECT_CONFIRM)
 
-        self.opp_pokemon["hp"] = new_opp_hp
-        print(f"[Result] Opponent HP: {self.opp_pokemon['hp']}")
+        self.opp_pokemon.hp = new_opp_hp
+        print(f"[Result] Opponent HP: {new_opp_hp}")
 
-        if self.opp_pokemon["hp"] <= 0:
+        if new_opp_hp <= 0:
             print("Opponent fainted. Waiting for result...")
-            try:
-                m, p = self.battle_queue.get(timeout=3)
-                if m == "GAME_OVER":
-                    print("\n=== VICTORY! ===")
-                    self.running = False
-                    return
-            except queue.Empty:
-                pass
+            item = self.battle_queue.pop_wait(timeout=3)
+            if item and item[0] == "GAME_OVER":
+                print("\n=== VICTORY! ===")
+                self.running = False
+                return
             if self.check_game_over():
                 return
 
@@ -488,32 +706,34 @@ class P2PGame:
     def play_opp_turn(self):
         print(f"\n[Opponent Turn] Waiting...")
         # STEP 1: Wait for Attack
-        msg_type, payload = self.wait_for_packet(["ATTACK_ANNOUNCE", "GAME_OVER"])
+        msg_type, payload = self.wait_for_packet(EXPECT_ATTACK)
         if msg_type == "GAME_OVER":
             self.check_game_over()
             return
         print(f"[RFC] Opponent declared: {payload['move_name']}")
 
         # STEP 2: Send Defense
-        self.net.send_reliable(
-            "DEFENSE_ANNOUNCE", {"hp": self.my_pokemon.hp, "status": "ready"}
-        )
+        self.defense_announce["hp"] = self.my_pokemon.hp
+        self.net.send_reliable("DEFENSE_ANNOUNCE", self.defense_announce)
 
         # STEP 3: Wait for Report
-        msg_type, payload = self.wait_for_packet(["CALCULATION_REPORT"])
+        msg_type, payload = self.wait_for_packet(EXPECT_REPORT)
         damage = int(payload["damage_dealt"])
         status_msg = payload.get("status_message", "")
-        print(f"\n**********************************************")
-        print(f"BATTLE EVENT: {status_msg}")
-        print(f"**********************************************\n")
+        sys.stdout.write(
+            f"\n{BANNER_RULE}\nBATTLE EVENT: {status_msg}\n{BANNER_RULE}\n\n"
+        )
 
         # STEP 4: Send Confirm
         self.pending_damage = damage
-        self.net.send_reliable("CALCULATION_CONFIRM", {})
+        self.net.send_reliable("CALCULATION_CONFIRM", self.calculation_confirm)
 
-        print(f"[Result] You took {self.pending_damage} damage!")
-        self.my_pokemon.hp = max(0, self.my_pokemon.hp - self.pending_damage)
-        print(f"[Status] HP: {self.my_pokemon.hp}/{self.my_pokemon.max_hp}")
+        me = self.my_pokemon
+        new_hp = max(0, me.hp - damage)
+        me.hp = new_hp
+        sys.stdout.write(
+            f"[Result] You took {damage} damage!\n[Status] HP: {new_hp}/{me.max_hp}\n"
+        )
 
         if self.check_game_over():
             return
@@ -521,47 +741,88 @@ class P2PGame:
 
     def wait_for_packet(self, expected_types):
         while self.running:
-            user_in = self.input_handler.get_input()
-            if user_in:
-                self.handle_chat_input(user_in)
-            try:
-                msg_type, payload = self.battle_queue.get(timeout=0.1)
-                if msg_type in expected_types:
-                    return msg_type, payload
-                elif msg_type == "GAME_OVER":
-                    self.check_game_over()
-                    return "GAME_OVER", {}
-            except queue.Empty:
+            item = self.battle_queue.pop_wait(timeout=0)
+            if item is None:
+                # Single blocking wait: returns on a line of input, or early
+                # when _on_battle_message wakes it for a new packet.
+                user_in = self.input_handler.get_blocking()
+                if user_in:
+                    # Handle anything else typed in the same burst in one go
+                    for line in [user_in] + self.input_handler.drain():
+                        self.handle_chat_input(line)
                 continue
+            msg_type, payload = item
+            if msg_type in expected_types:
+                return msg_type, payload
+            elif msg_type == "GAME_OVER":
+                self.check_game_over()
+                return "GAME_OVER", {}
         return None, None
 
-    def handle_message(self, msg_type, payload, addr):
+    # --- Network message handlers (called from the listener thread) ---
+    def _on_handshake_request(self, msg_type, payload, addr):
         # RFC 3.1: 3-Way Handshake
-        if msg_type == "HANDSHAKE_REQUEST":
-            self.net.set_peer(addr[0], addr[1])
-            self.net.send_reliable("HANDSHAKE_RESPONSE", {"seed": 12345})
-            self.state = "SETUP"
-        elif msg_type == "HANDSHAKE_RESPONSE":
-            self.state = "SETUP"
-        elif msg_type == "BATTLE_SETUP":
-            self.opp_pokemon = payload
-        elif msg_type == "CHAT_MESSAGE":
-            sender = payload.get("sender", "Peer")
-            ctype = payload.get("type", "text")
-            content = payload.get("content", "")
-            if ctype == "text":
-                print(f"\n[CHAT] {sender}: {content}")
-            elif ctype == "sticker":
-                filename = ChatManager.save_sticker(content, sender)
-                print(f"\n[CHAT] {sender} sent a sticker! Saved to {filename}")
-        elif msg_type in [
-            "ATTACK_ANNOUNCE",
-            "DEFENSE_ANNOUNCE",
-            "CALCULATION_REPORT",
-            "CALCULATION_CONFIRM",
-            "GAME_OVER",
-        ]:
-            self.battle_queue.put((msg_type, payload))
+        self.net.set_peer(addr[0], addr[1])
+        self.net.send_reliable("HANDSHAKE_RESPONSE", {"seed": 12345})
+        self.state = "SETUP"
+        self.handshake_done.set()
+
+    def _on_handshake_response(self, msg_type, payload, addr):
+        self.state = "SETUP"
+        self.handshake_done.set()
+
+    def _on_battle_setup(self, msg_type, payload, addr):
+        self.opp_pokemon = Pokemon.from_dict(payload)
+        self.opp_ready.set()
+        self.input_handler.wake()
+
+    def _on_chat_message(self, msg_type, payload, addr):
+        sender = payload.get("sender", "Peer")
+        ctype = payload.get("type", "text")
+        content = payload.get("content", "")
+        if ctype == "text":
+            print(f"\n[CHAT] {sender}: {content}")
+        elif ctype == "sticker":
+            self.io_pool.submit(self._save_sticker, content, sender)
+        elif ctype == "sticker_chunk":
+            content = self.sticker_assembler.add(
+                sender,
+                payload.get("sticker_id"),
+                payload.get("chunk_index", -1),
+                payload.get("chunk_total", 0),
+                content,
+            )
+            if content is not None:
+                self.io_pool.submit(self._save_sticker, content, sender)
+
+    def _save_sticker(self, content, sender):
+        # Runs on the io_pool worker so disk writes never hold up the listener
+        filename = self.sticker_sink.save(content, sender)
+        if filename:
+            print(f"\n[CHAT] {sender} sent a sticker! Saved to {filename}")
+
+    def _on_battle_message(self, msg_type, payload, addr):
+        # Turn-sequence messages are consumed by wait_for_packet on the main thread
+        self.battle_queue.append((msg_type, payload))
+        self.input_handler.wake()
+
+    # msg_type -> handler; one dict lookup per incoming message
+    MESSAGE_HANDLERS = {
+        "HANDSHAKE_REQUEST": _on_handshake_request,
+        "HANDSHAKE_RESPONSE": _on_handshake_response,
+        "BATTLE_SETUP": _on_battle_setup,
+        "CHAT_MESSAGE": _on_chat_message,
+        "ATTACK_ANNOUNCE": _on_battle_message,
+        "DEFENSE_ANNOUNCE": _on_battle_message,
+        "CALCULATION_REPORT": _on_battle_message,
+        "CALCULATION_CONFIRM": _on_battle_message,
+        "GAME_OVER": _on_battle_message,
+    }
+
+    def handle_message(self, msg_type, payload, addr):
+        handler = self.MESSAGE_HANDLERS.get(msg_type)
+        if handler is not None:
+            handler(self, msg_type, payload, addr)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+import collections
+import heapq
+import logging
 import socket
 import threading
 import time
@@ -5,10 +8,25 @@ import time
 # Use relative import for package internal reference
 from .protocol import PokeProtocol
 
+logger = logging.getLogger(__name__)
+
 # RFC 3.2: Reliability Layer Configuration
 # "The recommended timeout is 500 milliseconds, and the recommended maximum number of retries is 3."
 RETRY_DELAY = 0.5  # 500ms timeout
 MAX_RETRIES = 3  # Retry limit
+# The timeout adapts to the measured round-trip time (RFC 6298 estimator)
+# but stays within [MIN_RETRY_DELAY, RETRY_DELAY], so it is never slower
+# than the recommended 500ms.
+MIN_RETRY_DELAY = 0.1
+# A fast RTT only makes retransmits sooner: a message is given up on once
+# this long has passed since it was first sent, as with 3 retries of 500ms.
+DELIVERY_TIMEOUT = RETRY_DELAY * (MAX_RETRIES + 1)
+# Flow control: most bulk (sticker) messages in flight before send_reliable()
+# waits for ACKs. Bounds memory when the peer stalls and paces sticker bursts.
+# Battle messages don't count against it and never wait behind a burst.
+MAX_IN_FLIGHT = 32
+# Recently delivered (addr, sequence_number) pairs remembered for dedup
+SEEN_HISTORY = 4096
 
 # RFC Abstract: Sticker Support
 # Buffer size increased to ~64KB to accommodate Base64 encoded images.
@@ -18,6 +36,25 @@ BUFFER_SIZE = 65535
 # Dedicated port for LAN discovery packets.
 DISCOVERY_PORT = 8890
 
+# RFC 3.2: An ACK only ever carries the sequence number, so its wire form is
+# fixed apart from that one field. Same bytes PokeProtocol.serialize() emits.
+ACK_TEMPLATE = b"message_type: ACK\nsequence_number: %d"
+# Incoming ACKs in exactly that layout skip the generic parser
+ACK_PREFIX = ACK_TEMPLATE[: ACK_TEMPLATE.index(b"%")]
+
+
+class PendingMessage:
+    """A sent reliable message kept for retransmission until it is ACKed."""
+
+    __slots__ = ("type", "data", "retries", "sent_at", "bulk")
+
+    def __init__(self, msg_type, data, sent_at, bulk=False):
+        self.type = msg_type
+        self.data = data  # serialized datagram, resent as-is
+        self.retries = 0
+        self.sent_at = sent_at  # first transmission, for RTT sampling
+        self.bulk = bulk  # counted against the send window
+
 
 class ReliableTransport:
     """
@@ -38,6 +75,10 @@ class ReliableTransport:
             self.sock.bind(("0.0.0.0", 0))
 
         self.port = self.sock.getsockname()[1]
+        # Reused by the listener thread for every datagram instead of
+        # allocating a fresh 64KB bytes object per recvfrom()
+        self.recv_buf = bytearray(BUFFER_SIZE)
+        self.recv_view = memoryview(self.recv_buf)
         self.peer_addr = None
         self.verbose = verbose
         self.running = True
@@ -48,7 +89,24 @@ class ReliableTransport:
 
         # Buffer for tracking unacknowledged messages for retransmission
         self.unacked_msgs = {}
-        self.lock = threading.Lock()  # Thread safety for message buffer
+        # How many of those were sent with bulk=True
+        self.bulk_in_flight = 0
+        # (retransmit deadline, seq) min-heap; the retry worker pops due entries
+        self.retry_heap = []
+        # (addr, seq) of recently delivered messages, oldest first. A lost ACK
+        # makes the sender retransmit; the copy is ACKed again but not
+        # delivered twice. Filled by the listener.
+        self.seen = collections.OrderedDict()
+        # Round-trip estimate driving the retransmit timeout
+        self.srtt = None
+        self.rttvar = 0.0
+        self.rto = RETRY_DELAY
+        # Guards the message buffer; also wakes the retry worker when the
+        # buffer changes so it can sleep until the next retransmit deadline
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        # Same lock; signalled when a bulk entry leaves the buffer (ACK/timeout)
+        self.window = threading.Condition(self.lock)
         self.on_message = None  # Callback function for received messages
 
         # Background threads for listening and reliability management
@@ -62,74 +120,150 @@ class ReliableTransport:
         self.retry_worker.start()
         print(f"[Net] Listening on port {self.port}")
 
+    def stop(self):
+        """Stops the network threads and closes the socket."""
+        if not self.running:
+            return
+        self.running = False
+        # Wake the listener out of recvfrom(): a datagram to ourselves works
+        # everywhere, and on Linux shutdown() alone also unblocks it.
+        try:
+            self.sock.sendto(b"", ("127.0.0.1", self.port))
+        except OSError:
+            pass
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # unconnected UDP socket reports ENOTCONN
+        if self.listener.is_alive():
+            self.listener.join(timeout=0.5)
+        # Under the lock so the retry worker never sends on a closed socket
+        with self.cond:
+            self.cond.notify()
+            self.window.notify_all()
+            self.sock.close()
+
     def set_peer(self, ip, port):
         """Sets the target address for outgoing messages."""
+        # self.seen is keyed by address and is left alone: the host calls this
+        # from the HANDSHAKE_REQUEST handler, and a retransmitted request
+        # must still be recognised as a duplicate afterwards.
         self.peer_addr = (ip, int(port))
 
-    def send_reliable(self, msg_type, payload):
+    def send_reliable(self, msg_type, payload, bulk=False):
         """
         Sends a message with reliability guarantees (RFC 3.2).
         Assigns a sequence number and stores it for potential retransmission.
+        A bulk send waits while MAX_IN_FLIGHT bulk messages are unacknowledged;
+        every one of them is ACKed or times out within DELIVERY_TIMEOUT, so
+        this is bounded. Other sends never wait.
+        Returns False if the message was not sent.
         """
-        with self.lock:
+        with self.cond:
+            if bulk:
+                while self.running and self.bulk_in_flight >= MAX_IN_FLIGHT:
+                    self.window.wait()
+            if not self.running:
+                return False
+
             seq = self.seq_num
             self.seq_num += 1
 
-            # RFC 3.2: Inject sequence number into payload for tracking
-            payload["sequence_number"] = seq
-
-            data = PokeProtocol.serialize(msg_type, payload)
+            # RFC 3.2: Sequence number goes on the wire as its own field, so
+            # the caller's payload dict is left untouched and can be reused
+            data = PokeProtocol.serialize(msg_type, payload, sequence_number=seq)
 
             if len(data) > BUFFER_SIZE:
                 print(
                     f"[Error] Message too large ({len(data)} bytes)! Max is {BUFFER_SIZE}."
                 )
-                return
+                return False
 
             # Buffer the message for the retry loop
-            self.unacked_msgs[seq] = {
-                "data": data,
-                "time": time.time(),
-                "retries": 0,
-                "type": msg_type,
-            }
+            now = time.monotonic()
+            self.unacked_msgs[seq] = PendingMessage(msg_type, data, now, bulk)
+            if bulk:
+                self.bulk_in_flight += 1
             self._send_raw(data)
+            heapq.heappush(self.retry_heap, (now + self.rto, seq))
+            if self.retry_heap[0][1] == seq:
+                self.cond.notify()  # new earliest deadline
             if self.verbose:
                 print(f"[Sent] {msg_type} (Seq: {seq})")
+            return True
 
     def send_ack(self, seq_to_ack, addr):
         """
         RFC 3.2: Acknowledgements.
         "Upon receiving a message... the peer MUST send an ACK message."
         """
-        ack_payload = {"sequence_number": seq_to_ack}
-        data = PokeProtocol.serialize("ACK", ack_payload)
-        self.sock.sendto(data, addr)
+        self.sock.sendto(ACK_TEMPLATE % seq_to_ack, addr)
 
     def _send_raw(self, data):
         """Helper to send bytes to the peer if address is set."""
         if self.peer_addr:
             self.sock.sendto(data, self.peer_addr)
 
+    def _on_ack(self, seq_acked):
+        with self.cond:
+            # Remove from buffer -> Stop retransmitting
+            info = self.unacked_msgs.pop(seq_acked, None)
+            if info is None:
+                return
+            if info.bulk:
+                self._release_bulk()
+            if self.verbose:
+                print(f"[Ack] Received ACK for Seq {seq_acked}")
+            # Karn's rule: an ACK for a retransmitted message can't tell
+            # which copy it answers, so only first transmissions are sampled
+            if info.retries == 0:
+                self._update_rto(time.monotonic() - info.sent_at)
+
+    def _release_bulk(self):
+        """Frees a send window slot. Caller holds the lock."""
+        self.bulk_in_flight -= 1
+        self.window.notify()
+
+    def _update_rto(self, rtt):
+        """Folds one round-trip sample into the timeout (RFC 6298, 2.2-2.3)."""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        rto = self.srtt + 4 * self.rttvar
+        self.rto = min(RETRY_DELAY, max(MIN_RETRY_DELAY, rto))
+
     def _listen_loop(self):
         """Background thread loop for receiving UDP packets."""
         while self.running:
             try:
-                data, addr = self.sock.recvfrom(BUFFER_SIZE)
-                msg_type, payload = PokeProtocol.deserialize(data)
+                nbytes, addr = self.sock.recvfrom_into(self.recv_buf)
+                if not self.running:
+                    break
+
+                # RFC 3.2: ACKs are about half of all traffic; one in the
+                # layout send_ack() produces is handled without a full parse
+                if self.recv_buf.startswith(ACK_PREFIX, 0, nbytes):
+                    try:
+                        seq_acked = int(self.recv_buf[len(ACK_PREFIX) : nbytes])
+                    except ValueError:
+                        pass  # other field layout; take the generic path
+                    else:
+                        self._on_ack(seq_acked)
+                        continue
+
+                msg_type, payload = PokeProtocol.deserialize(
+                    self.recv_view[:nbytes]
+                )
 
                 if not msg_type:
                     continue
 
                 # RFC 3.2: Handling Incoming ACKs
                 if msg_type == "ACK":
-                    seq_acked = int(payload.get("sequence_number", -1))
-                    with self.lock:
-                        if seq_acked in self.unacked_msgs:
-                            if self.verbose:
-                                print(f"[Ack] Received ACK for Seq {seq_acked}")
-                            # Remove from buffer -> Stop retransmitting
-                            del self.unacked_msgs[seq_acked]
+                    self._on_ack(int(payload.get("sequence_number", -1)))
                     continue
 
                 # RFC 3.2: Handling Incoming Reliable Messages
@@ -137,6 +271,12 @@ class ReliableTransport:
                 sender_seq = payload.get("sequence_number")
                 if sender_seq is not None:
                     self.send_ack(sender_seq, addr)
+                    key = (addr, sender_seq)
+                    if key in self.seen:
+                        continue  # retransmitted copy; already delivered
+                    self.seen[key] = None
+                    if len(self.seen) > SEEN_HISTORY:
+                        self.seen.popitem(last=False)
 
                 # Pass valid game messages up to the main application
                 if self.on_message:
@@ -149,26 +289,43 @@ class ReliableTransport:
     def _retry_loop(self):
         """
         RFC 3.2: Retransmission Logic.
-        Checks for timeouts (500ms) and resends messages up to 3 times.
+        Checks for timeouts (adaptive, at most 500ms) and resends messages
+        until DELIVERY_TIMEOUT has passed since they were first sent.
         """
-        while self.running:
-            time.sleep(0.1)  # Check every 100ms
-            with self.lock:
-                now = time.time()
-                # Iterate over copy to allow safe deletion
-                for seq, info in list(self.unacked_msgs.items()):
-                    if now - info["time"] > RETRY_DELAY:
-                        if info["retries"] < MAX_RETRIES:
-                            print(f"[Retry] Resending {info['type']} (Seq {seq})...")
-                            info["retries"] += 1
-                            info["time"] = now
-                            self._send_raw(info["data"])
-                        else:
-                            # RFC 3.2: "If max retries reached... assume connection lost."
-                            print(
-                                f"[Timeout] Failed to deliver {info['type']} (Seq {seq})"
-                            )
-                            del self.unacked_msgs[seq]
+        heap = self.retry_heap
+        with self.cond:
+            while self.running:
+                now = time.monotonic()
+                # Only entries whose deadline has passed are touched
+                while heap and heap[0][0] <= now:
+                    _, seq = heapq.heappop(heap)
+                    info = self.unacked_msgs.get(seq)
+                    if info is None:
+                        continue  # ACKed since it was scheduled
+                    give_up_at = info.sent_at + DELIVERY_TIMEOUT
+                    if now < give_up_at:
+                        # Diagnostic only: formatted lazily, and no console
+                        # write while holding the lock during packet loss
+                        logger.debug("[Retry] Resending %s (Seq %s)", info.type, seq)
+                        info.retries += 1
+                        self._send_raw(info.data)
+                        # RFC 6298 5.5: a timeout backs off the shared RTO too,
+                        # so the rest of a burst doesn't retransmit spuriously
+                        # after an RTT jump. The next clean sample resets it.
+                        self.rto = min(RETRY_DELAY, self.rto * 2)
+                        # Exponential backoff, capped at the RFC timeout
+                        backoff = min(RETRY_DELAY, self.rto * (2**info.retries))
+                        heapq.heappush(heap, (min(now + backoff, give_up_at), seq))
+                    else:
+                        # RFC 3.2: "If max retries reached... assume connection lost."
+                        print(f"[Timeout] Failed to deliver {info.type} (Seq {seq})")
+                        del self.unacked_msgs[seq]
+                        if info.bulk:
+                            self._release_bulk()
+                # Sleep until the earliest deadline; send_reliable() and stop()
+                # notify us. ACKed entries are left in the heap and skipped
+                # when they come due, so an ACK needs no wakeup.
+                self.cond.wait(heap[0][0] - now if heap else None)
 
 
 class DiscoveryManager:
@@ -181,10 +338,14 @@ class DiscoveryManager:
         self.game_port = game_port
         self.broadcasting = False
         self.broadcast_thread = None
+        # Set by stop_broadcast() so the announce loop exits without
+        # sleeping out its current interval
+        self.stop_event = threading.Event()
 
     def start_broadcast(self):
         """Starts announcing presence on the LAN."""
         self.broadcasting = True
+        self.stop_event.clear()
         self.broadcast_thread = threading.Thread(
             target=self._broadcast_loop, daemon=True
         )
@@ -192,21 +353,29 @@ class DiscoveryManager:
 
     def stop_broadcast(self):
         self.broadcasting = False
+        self.stop_event.set()
 
     def _broadcast_loop(self):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-
         msg = PokeProtocol.serialize("BROADCAST_ANNOUNCE", {"port": self.game_port})
 
-        print("[Discovery] Broadcasting game availability...")
-        while self.broadcasting:
-            try:
-                sock.sendto(msg, ("<broadcast>", DISCOVERY_PORT))
-                time.sleep(2)  # Announce presence every 2 seconds
-            except Exception as e:
-                print(f"[Discovery Error] {e}")
-                time.sleep(5)
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+            connected = False
+
+            print("[Discovery] Broadcasting game availability...")
+            while self.broadcasting:
+                try:
+                    if not connected:
+                        # Resolve the broadcast address once; each announce
+                        # is then a plain send() on the connected socket
+                        sock.connect(("<broadcast>", DISCOVERY_PORT))
+                        connected = True
+                    sock.send(msg)
+                    delay = 2  # Announce presence every 2 seconds
+                except Exception as e:
+                    print(f"[Discovery Error] {e}")
+                    delay = 5
+                self.stop_event.wait(delay)
 
     @staticmethod
     def scan_for_games(timeout=5):
@@ -217,16 +386,21 @@ class DiscoveryManager:
             sock.bind(("0.0.0.0", DISCOVERY_PORT))
         except OSError:
             print("[Discovery] Port busy. Cannot scan.")
-            return []
+            sock.close()
+            return {}
 
-        sock.settimeout(1.0)
         found_hosts = {}
 
-        start_time = time.time()
+        deadline = time.monotonic() + timeout
         print(f"[Discovery] Scanning for {timeout} seconds...")
 
-        while time.time() - start_time < timeout:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             try:
+                # Wait exactly until the next announce or the end of the scan
+                sock.settimeout(remaining)
                 data, addr = sock.recvfrom(1024)
                 msg_type, payload = PokeProtocol.deserialize(data)
 
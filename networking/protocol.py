@@ -1,4 +1,20 @@
 import json
+import logging
+
+# Bound once: skips json.dumps/json.loads argument handling on every field.
+# Compact separators also trim a few bytes per nested structure on the wire.
+_json_encode = json.JSONEncoder(separators=(",", ":")).encode
+_json_decode = json.JSONDecoder().decode
+
+# Characters a numeric field value can start with
+_NUMBER_START = frozenset("+-.0123456789")
+
+logger = logging.getLogger(__name__)
+
+# Limits on what deserialize() will parse: no valid message is larger than
+# one UDP datagram or has anywhere near this many fields.
+MAX_FRAME = 65535
+MAX_FIELDS = 128
 
 
 class PokeProtocol:
@@ -8,9 +24,11 @@ class PokeProtocol:
     """
 
     @staticmethod
-    def serialize(message_type, payload=None):
+    def serialize(message_type, payload=None, sequence_number=None):
         """
         RFC 4.0: "All messages are plain text with newline-separated key: value pairs."
+        RFC 3.2: `sequence_number`, if given, is written as one more field
+        without being added to `payload`.
         """
         if payload is None:
             payload = {}
@@ -21,9 +39,12 @@ class PokeProtocol:
         for key, value in payload.items():
             # Complex structures (arrays/objects) are serialized as JSON strings
             if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+                value = _json_encode(value)
             lines.append(f"{key}: {value}")
 
+        if sequence_number is not None:
+            lines.append(f"sequence_number: {sequence_number}")
+
         message_str = "\n".join(lines)
         return message_str.encode("utf-8")
 
@@ -32,38 +53,49 @@ class PokeProtocol:
         """
         Parses the raw bytes into a python dictionary.
         Handles type conversion for integers (e.g. HP, Damage) and JSON objects (e.g. Stats).
+        Oversized frames are rejected and at most MAX_FIELDS lines are read.
         """
+        if len(data_bytes) > MAX_FRAME:
+            return None, {}
         try:
-            text = data_bytes.decode("utf-8")
-            lines = text.split("\n")
-            data = {}
-
-            for line in lines:
-                if ": " in line:
-                    key, value = line.split(": ", 1)
-
-                    # Heuristic parsing for types
-                    if value.startswith("{") or value.startswith("["):
-                        try:
-                            value = json.loads(value)
-                        except json.JSONDecodeError:
-                            pass
-                    else:
-                        try:
-                            value = int(value)
-                        except ValueError:
-                            try:
-                                value = float(value)
-                            except ValueError:
-                                pass
-
-                    data[key] = value
-
-            if "message_type" not in data:
-                return None, {}
-
-            return data["message_type"], data
-
-        except Exception as e:
-            print(f"[Protocol Error] Failed to parse: {e}")
+            # str() decodes any buffer (bytes, bytearray, memoryview) in place
+            text = str(data_bytes, "utf-8")
+        except UnicodeDecodeError as e:
+            # Stray or corrupt datagram; nothing the player can act on
+            logger.debug("[Protocol Error] Failed to parse: %s", e)
             return None, {}
+        data = {}
+
+        # maxsplit bounds the list; the unsplit remainder is dropped
+        for line in text.split("\n", MAX_FIELDS)[:MAX_FIELDS]:
+            # One scan finds the separator and splits on it
+            key, sep, value = line.partition(": ")
+            if not sep:
+                continue
+
+            # Heuristic parsing for types, keyed on the first character
+            # so plain text fields skip the int()/float() exceptions
+            first = value[:1]
+            if first == "{" or first == "[":
+                try:
+                    value = _json_decode(value)
+                except (ValueError, RecursionError):
+                    # Malformed (JSONDecodeError is a ValueError), an integer
+                    # past the int-digits limit, or absurdly nested; keep the
+                    # raw text
+                    pass
+            elif first in _NUMBER_START:
+                try:
+                    value = int(value)
+                except ValueError:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+
+            data[key] = value
+
+        if "message_type" not in data:
+            return None, {}
+
+        return data["message_type"], data